@@ -34,7 +34,7 @@ def p_error(p):
     print("Error de sintaxis en '%s'" % p.value if p else "EOF")
 
 # Construir el parser
-parser = yacc.yacc()
+parser = yacc.yacc(debug=False, write_tables=True, tabmodule="g1_parsetab")
 
 if __name__ == "__main__":
     while True:
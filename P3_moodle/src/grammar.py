@@ -1,7 +1,15 @@
 from __future__ import annotations
 
 from collections import deque
-from typing import Set, AbstractSet, Collection, MutableSet, Optional, Dict, List, Optional
+from typing import Set, AbstractSet, Collection, Optional, Dict, FrozenSet, Iterator, List, Mapping, Sequence, Tuple
+
+_EPS = 1  # bit standing for ε in FIRST/FOLLOW bitmasks
+
+# kinds of stack symbols in LL1Table.analyze
+_TERMINAL = 0
+_NON_TERMINAL = 1
+_END = 2
+
 
 class RepeatedCellError(Exception):
     """Exception for repeated cells in LL(1) tables."""
@@ -45,27 +53,37 @@ class Grammar:
                 f"Set of non-terminals and productions keys should be equal."
             )
         
+        used: Set[str] = set()
         for nt, rhs in productions.items():
             if not rhs:
                 raise ValueError(
                     f"No production rules for non terminal symbol {nt} "
                 )
             for r in rhs:
-                for s in r:
-                    if (
-                        s not in non_terminals
-                        and s not in terminals
-                    ):
-                        raise ValueError(
-                            f"Invalid symbol {s}.",
-                        )
+                used.update(r)
+
+        invalid = used - terminals - non_terminals
+        if invalid:
+            raise ValueError(
+                f"Invalid symbol {', '.join(sorted(invalid))}.",
+            )
 
         self.terminals = terminals
         self.non_terminals = non_terminals
         self.productions = productions
         self.axiom = axiom
-        self.first_cache: Dict[str, Set[str]] = {}
-        self.follow_cache: Dict[str, Set[str]] = {nt: set() for nt in self.non_terminals}
+        # FIRST and FOLLOW sets are stored as bitmasks: bit 0 stands for ε
+        # and every terminal (including the end marker $) gets its own bit
+        self._bit_symbols: List[str] = [''] + sorted(terminals - {'$'}) + ['$']
+        self._term_bit: Dict[str, int] = {
+            t: 1 << i for i, t in enumerate(self._bit_symbols)
+        }
+        self.first_cache: Dict[str, int] = {}
+        self._first_done = False
+        self.follow_cache: Dict[str, int] = {}
+        self._follow_done = False
+        self._first_seq_cache: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+        self._nullable: Optional[FrozenSet[str]] = None
 
     def __repr__(self) -> str:
         return (
@@ -78,115 +96,263 @@ class Grammar:
 
 
 
-    def compute_first(self, sentence: List[str]) -> AbstractSet[str]:
+    def _encode_productions(
+        self,
+        nt_symbols: List[str],
+    ) -> List[Tuple[int, Tuple[int, ...]]]:
+        """
+        Encode the productions as (head index, right-hand side) pairs of
+        integers. Non terminals are encoded by their index in nt_symbols
+        and terminals by their negated bit, so both kinds of symbols are
+        told apart by sign.
+        """
+        code = {t: -bit for t, bit in self._term_bit.items()}
+        code.update((nt, i) for i, nt in enumerate(nt_symbols))
+        encode = code.__getitem__
+        return [
+            (code[head], tuple(map(encode, prod)))
+            for head in nt_symbols
+            for prod in self.productions[head]
+        ]
+
+    @property
+    def nullable(self) -> FrozenSet[str]:
+        """Non terminals that derive the empty string."""
+        if self._nullable is None:
+            self._nullable = self._compute_nullable()
+        return self._nullable
+
+    def _compute_nullable(self) -> FrozenSet[str]:
+        """
+        Compute the set of non terminals that derive the empty string.
+
+        A non terminal is nullable if it has a production all of whose
+        symbols are nullable (in particular, an empty production).
+        """
+        nullable: Set[str] = set()
+
+        changed = True
+        while changed:
+            changed = False
+            for nt, productions in self.productions.items():
+                if nt in nullable:
+                    continue
+                if any(
+                    all(s in nullable for s in prod) for prod in productions
+                ):
+                    nullable.add(nt)
+                    changed = True
+
+        return frozenset(nullable)
+
+    def _mask_to_set(self, mask: int) -> FrozenSet[str]:
+        """Convert a bitmask of terminals and/or ε into a set of symbols."""
+        return frozenset(
+            symbol for i, symbol in enumerate(self._bit_symbols)
+            if mask >> i & 1
+        )
+
+    def compute_first(self, sentence: Sequence[str]) -> AbstractSet[str]:
         """
         Method to compute the FIRST set of a string.
 
+        The FIRST set of every sequence is memoized, as the grammar does not
+        change after construction.
+
         Args:
             sentence: list of symbols whose FIRST set is to be computed.
 
         Returns:
             Set of terminals and/or ε representing FIRST(sentence)
         """
+        key = tuple(sentence)
+        first = self._first_seq_cache.get(key)
+        if first is None:
+            first = self._mask_to_set(self._first_mask(key))
+            self._first_seq_cache[key] = first
+        return first
+	# TO-DO: Complete this method for exercise 3...
 
-        def _first(seq: List[str]) -> Set[str]:
-            first_set: Set[str] = set()
 
-            if not seq:
-                first_set.add('')
-                return first_set
+    def _ensure_first(self) -> None:
+        """
+        Compute the FIRST sets of all non terminals.
 
-            for i, symbol in enumerate(seq):
-                if symbol in self.terminals:
-                    first_set.add(symbol)
-                    break  # terminal stops the sequence
-                elif symbol in self.non_terminals:
-                    # use self.first_cache instead of local cache
-                    if symbol not in self.first_cache:
-                        self.first_cache[symbol] = set()
-                        for production in self.productions[symbol]:
-                            self.first_cache[symbol].update(_first(production))
+        Classic bottom-up fixpoint: every production head -> X1...Xk adds
+        FIRST(X1...Xk) to FIRST(head) until no set changes. It only runs
+        once and its results are kept in first_cache.
+        """
+        if self._first_done:
+            return
 
-                    first_set.update(self.first_cache[symbol] - {''})
+        nt_symbols = sorted(self.non_terminals)
+        encoded_productions = self._encode_productions(nt_symbols)
+        first = [0] * len(nt_symbols)
 
-                    if '' not in self.first_cache[symbol]:
+        changed = True
+        while changed:
+            changed = False
+            for head, rhs in encoded_productions:
+                mask = 0
+                for s in rhs:
+                    if s < 0:
+                        mask |= -s
+                        break  # terminal stops the sequence
+                    mask |= first[s] & ~_EPS
+                    if not first[s] & _EPS:
                         break  # stop if symbol is not nullable
                 else:
-                    raise ValueError(f"Symbol {symbol} is neither terminal nor non-terminal.")
-
-                # if last symbol is nullable, add ε
-                if i == len(seq) - 1:
-                    first_set.add('')
+                    mask |= _EPS
 
-            return first_set
+                if mask & ~first[head]:
+                    first[head] |= mask
+                    changed = True
 
-        return _first(sentence)
-	# TO-DO: Complete this method for exercise 3...
+        self.first_cache = dict(zip(nt_symbols, first))
+        if self._nullable is None:
+            # the nullable non terminals are those whose FIRST contains ε
+            self._nullable = frozenset(
+                nt for nt, mask in self.first_cache.items() if mask & _EPS
+            )
+        self._first_done = True
+
+    def _first_mask(self, sentence: Tuple[str, ...]) -> int:
+        """Compute FIRST(sentence) as a bitmask."""
+        self._ensure_first()
+
+        mask = 0
+        for symbol in sentence:
+            if symbol in self.terminals:
+                mask |= self._term_bit[symbol]
+                break  # terminal stops the sequence
+            elif symbol in self.non_terminals:
+                first_symbol = self.first_cache[symbol]
+                mask |= first_symbol & ~_EPS
+                if not first_symbol & _EPS:
+                    break  # stop if symbol is not nullable
+            else:
+                raise ValueError(f"Symbol {symbol} is neither terminal nor non-terminal.")
+        else:
+            # every symbol is nullable (or the sentence is empty)
+            mask |= _EPS
 
+        return mask
 
     def compute_follow(self, symbol: str) -> AbstractSet[str]:
-        # Ensure FIRST sets are computed
-        for nt in self.non_terminals:
-            self.compute_first([nt])
-
         if symbol not in self.non_terminals:
             raise ValueError(f"{symbol} is not a non-terminal")
 
-        # Initialize FOLLOW cache if it doesn't exist
-        self.follow_cache = {nt: set() for nt in self.non_terminals}
-        self.follow_cache[self.axiom].add('$')  # Add $ to start symbol
+        self._ensure_follow()
+        return self._mask_to_set(self.follow_cache[symbol])
+	# TO-DO: Complete this method for exercise 4...
 
-        changed = True
-        while changed:
-            changed = False
-            
-            # Iterate over all productions
-            for head, productions in self.productions.items():
-                for prod in productions:  
-                    for i, A in enumerate(prod):
-                        if A not in self.non_terminals:
-                            continue
-                        
-                        # ω are the symbols after A
-                        omega = prod[i + 1:]
-                        
-                        # Compute FIRST*(ω)
-                        first_omega = set()
-                        if omega:
-                            for sym in omega:
-                                if sym in self.non_terminals:
-                                    first_omega |= self.first_cache[sym] - {''}
-                                    if '' not in self.first_cache[sym]:
-                                        break
-                                else:
-                                    first_omega.add(sym)
-                                    break  
-                            else:
-                                first_omega.add('')
+
+    def _ensure_follow(self) -> None:
+        """
+        Compute the FOLLOW sets of all non terminals.
+
+        The grammar does not change after construction, so the fixpoint only
+        runs once and its results are kept in follow_cache.
+        """
+        if self._follow_done:
+            return
+
+        edges, dependents = self._build_follow_edges()
+
+        follow: Dict[str, int] = {nt: 0 for nt in self.non_terminals}
+        follow[self.axiom] = self._term_bit['$']  # Add $ to start symbol
+
+        # Only revisit A when FOLLOW(head) grew for some rule head -> γAω
+        # with ε ∈ FIRST*(ω)
+        worklist = deque(self.non_terminals)
+        queued = set(self.non_terminals)
+        while worklist:
+            A = worklist.popleft()
+            queued.discard(A)
+            follow_A = follow[A]
+
+            for head, to_add, nullable in edges[A]:
+                # FOLLOW(A) += FIRST*(ω) - {ε}
+                follow_A |= to_add
+                # If ε ∈ FIRST*(ω), FOLLOW(A) += FOLLOW(head)
+                if nullable:
+                    follow_A |= follow[head]
+
+            if follow_A != follow[A]:
+                follow[A] = follow_A
+                for B in dependents[A]:
+                    if B not in queued:
+                        queued.add(B)
+                        worklist.append(B)
+
+        self.follow_cache = follow
+        self._follow_done = True
+
+    def _build_follow_edges(
+        self,
+    ) -> Tuple[Dict[str, List[Tuple[str, int, bool]]], Dict[str, Set[str]]]:
+        """
+        Precompute, for each non terminal A, the contributions of every
+        occurrence head -> γAω to FOLLOW(A) as (head, FIRST*(ω) - {ε},
+        ε ∈ FIRST*(ω)), together with the reverse dependencies between
+        FOLLOW sets.
+        """
+        edges: Dict[str, List[Tuple[str, int, bool]]] = {
+            nt: [] for nt in self.non_terminals
+        }
+        dependents: Dict[str, Set[str]] = {nt: set() for nt in self.non_terminals}
+
+        # Ensure FIRST sets are computed
+        self._ensure_first()
+
+        for head, productions in self.productions.items():
+            for prod in productions:
+                # Walk the production right to left, so FIRST*(ω) - {ε} and
+                # the nullability of ω are extended by one symbol per step
+                # instead of being recomputed for every suffix ω
+                first_omega = 0
+                nullable = True
+                for A in reversed(prod):
+                    if A in self.non_terminals:
+                        edges[A].append((head, first_omega, nullable))
+                        if nullable:
+                            dependents[head].add(A)
+
+                        first_A = self.first_cache[A] & ~_EPS
+                        if A in self.nullable:
+                            first_omega |= first_A
                         else:
-                            first_omega.add('')
-                        
-                        # FOLLOW(A) += FIRST*(ω) - {ε}
-                        to_add = first_omega - {''}
-                        if not to_add.issubset(self.follow_cache[A]):
-                            self.follow_cache[A] |= to_add
-                            changed = True
-                        
-                        # If ε ∈ FIRST*(ω), FOLLOW(A) += FOLLOW(head)
-                        if '' in first_omega:
-                            if not self.follow_cache[head].issubset(self.follow_cache[A]):
-                                self.follow_cache[A] |= self.follow_cache[head]
-                                changed = True
-
-        return self.follow_cache[symbol]
-	# TO-DO: Complete this method for exercise 4...
+                            first_omega = first_A
+                            nullable = False
+                    else:
+                        first_omega = self._term_bit[A]
+                        nullable = False
 
+        return edges, dependents
 
     def get_ll1_table(self) -> Optional[LL1Table]:
-        # Ensure FOLLOW sets are computed
-        for nt in self.non_terminals:
-            self.compute_follow(nt)
+        try:
+            return self._build_ll1_table()
+        except RepeatedCellError:
+            # Conflict: grammar is not LL(1)
+            return None
 
+
+    def is_ll1(self) -> bool:
+        try:
+            self._build_ll1_table()
+        except RepeatedCellError:
+            return False
+        return True
+
+    def _build_ll1_table(self) -> LL1Table:
+        """
+        Build the LL(1) table of the grammar.
+
+        Raises:
+            RepeatedCellError: as soon as two productions share a cell, i.e.
+              the grammar is not LL(1).
+        """
         # Terminals = all symbols appearing in productions minus non-terminals
         terminals = set()
         for prods in self.productions.values():
@@ -198,34 +364,28 @@ class Grammar:
         table = LL1Table(self.non_terminals, terminals)
 
         for head, prods in self.productions.items():
+            # FOLLOW(head) is only needed for nullable productions
+            follow_head: Optional[AbstractSet[str]] = None
             for prod in prods:
+                body = ''.join(prod)
                 # Compute FIRST*(prod)
-                first_alpha = self.compute_first(prod)  # returns set including '' if nullable
+                first_alpha = self.compute_first(tuple(prod))  # returns set including '' if nullable
+                nullable_rhs = '' in first_alpha
 
                 # For each terminal in FIRST*(prod) excluding ε
                 for terminal in first_alpha - {''}:
-                    try:
-                        table.add_cell(head, terminal, ''.join(prod))
-                    except RepeatedCellError:
-                        # Conflict: grammar is not LL(1)
-                        return None
+                    table.add_cell(head, terminal, body)
 
                 # If ε ∈ FIRST*(prod), add production to FOLLOW(head)
-                if '' in first_alpha:
-                    for terminal in self.follow_cache[head]:
-                        try:
-                            table.add_cell(head, terminal, ''.join(prod))
-                        except RepeatedCellError:
-                            # Conflict: grammar is not LL(1)
-                            return None
+                if nullable_rhs:
+                    if follow_head is None:
+                        follow_head = self.compute_follow(head)
+                    for terminal in follow_head:
+                        table.add_cell(head, terminal, body)
 
         return table
 
 
-    def is_ll1(self) -> bool:
-        return self.get_ll1_table() is not None
-
-
 class LL1Table:
     """
     LL1 table. Initially all cells are set to None (empty). Table cells
@@ -251,14 +411,39 @@ class LL1Table:
 
         self.terminals: AbstractSet[str] = terminals
         self.non_terminals: AbstractSet[str] = non_terminals
-        self.cells: Dict[str, Dict[str, Optional[str]]] = {nt: {t: None for t in terminals} for nt in non_terminals}
+        self._alphabet: FrozenSet[str] = frozenset(terminals) | frozenset(non_terminals)
+        # cells are stored row-major in a flat list indexed by
+        # nt_idx * ncols + t_idx
+        self._nt_idx: Dict[str, int] = {nt: i for i, nt in enumerate(non_terminals)}
+        self._t_idx: Dict[str, int] = {t: i for i, t in enumerate(terminals)}
+        self._ncols = len(terminals)
+        self._cells: List[Optional[str]] = [None] * (len(non_terminals) * self._ncols)
+        # kind of every stack symbol, so analyze dispatches on a single lookup
+        self._kind: Dict[str, int] = {t: _TERMINAL for t in terminals}
+        self._kind.update({nt: _NON_TERMINAL for nt in non_terminals})
+        self._kind['$'] = _END
+
+    @property
+    def cells(self) -> Mapping[str, Mapping[str, Optional[str]]]:
+        """
+        Read-only view of the table cells, indexed by non terminal and
+        terminal. Cells cannot be written through it; use add_cell instead.
+        """
+        return _CellsView(self)
 
     def __repr__(self) -> str:
+        cells = {
+            nt: {
+                t: self._cells[i * self._ncols + j]
+                for t, j in self._t_idx.items()
+            }
+            for nt, i in self._nt_idx.items()
+        }
         return (
             f"{type(self).__name__}("
             f"terminals={self.terminals!r}, "
             f"non_terminals={self.non_terminals!r}, "
-            f"cells={self.cells!r})"
+            f"cells={cells!r})"
         )
 
     def add_cell(self, non_terminal: str, terminal: str, cell_body: str) -> None:
@@ -283,16 +468,17 @@ class LL1Table:
                 "Trying to add cell for terminal symbol not included "
                 "in table.",
             )
-        if not all(x in self.terminals | self.non_terminals for x in cell_body):
+        if not self._alphabet.issuperset(cell_body):
             raise ValueError(
                 "Trying to add cell whose body contains elements that are "
                 "not either terminals nor non terminals.",
             )            
-        if self.cells[non_terminal][terminal] is not None:
+        idx = self._nt_idx[non_terminal] * self._ncols + self._t_idx[terminal]
+        if self._cells[idx] is not None:
             raise RepeatedCellError(
                 f"Repeated cell ({non_terminal}, {terminal}).")
         else:
-            self.cells[non_terminal][terminal] = cell_body
+            self._cells[idx] = cell_body
 
     def analyze(self, input_string: str, start: str) -> ParseTree:
         """
@@ -312,44 +498,58 @@ class LL1Table:
         input_list: List[str] = list(input_string)  # input with end-marker
         tree_stack: List[ParseTree] = [ParseTree('$'), ParseTree(start)]  # parse tree nodes
 
+        stack_pop = stack.pop
+        stack_extend = stack.extend
+        push_tree = tree_stack.append
+        pop_tree = tree_stack.pop
+        extend_trees = tree_stack.extend
+        kind_of = self._kind.get
+        nt_index = self._nt_idx
+        t_index = self._t_idx.get
+        cells = self._cells
+        ncols = self._ncols
+        n = len(input_list)
+
         i = 0  # input pointer
-        while i < len(input_list):
+        while i < n:
             if not stack:
                 raise SyntaxError("Stack emptied before input fully consumed")
 
             stackTop = stack[-1]          # peek top of stack
-            current_tree = tree_stack.pop()
+            current_tree = pop_tree()
             currentSymbol = input_list[i]
+            kind = kind_of(stackTop, -1)
 
             # Terminal or end-marker
-            if stackTop in self.terminals or stackTop == '$':
+            if kind == _TERMINAL or kind == _END:
                 if stackTop == currentSymbol:
-                    stack.pop()   # match terminal
+                    stack_pop()   # match terminal
                     i += 1        # consume input symbol
                 else:
                     raise SyntaxError(f"Unexpected symbol '{currentSymbol}', expected '{stackTop}'")
 
             # Non-terminal
-            elif stackTop in self.non_terminals:
-                production = self.cells.get(stackTop, {}).get(currentSymbol)
+            elif kind == _NON_TERMINAL:
+                t_idx = t_index(currentSymbol)
+                production = (
+                    None if t_idx is None
+                    else cells[nt_index[stackTop] * ncols + t_idx]
+                )
                 if production is None:
                     raise SyntaxError(f"No rule for '{stackTop}' on input '{currentSymbol}'")
 
-                stack.pop()  # pop non-terminal
+                stack_pop()  # pop non-terminal
 
                 if production == '':  # epsilon production
-                    current_tree.children = []
+                    current_tree.children = ()
                 else:
-                    children: List[ParseTree] = []
+                    children = tuple(map(ParseTree, production))
                     # push RHS symbols in reverse order
-                    for symbol in reversed(production):
-                        stack.append(symbol)
-                        child_tree = ParseTree(symbol)
-                        tree_stack.append(child_tree)
-                        children.insert(0, child_tree)  # maintain left-to-right order
+                    stack_extend(production[::-1])
+                    extend_trees(children[::-1])
                     current_tree.children = children
 
-                tree_stack.append(current_tree)  # push updated tree node
+                push_tree(current_tree)  # push updated tree node
 
             else:
                 raise SyntaxError(f"Invalid symbol '{stackTop}' on stack")
@@ -364,6 +564,41 @@ class LL1Table:
 	# TO-DO: Complete this method for exercise 2...
     
     
+class _CellsView(Mapping[str, Mapping[str, Optional[str]]]):
+    """Read-only rows of an LL1Table, backed by its flat cell list."""
+
+    def __init__(self, table: LL1Table) -> None:
+        self._table = table
+
+    def __getitem__(self, non_terminal: str) -> _CellsRow:
+        table = self._table
+        return _CellsRow(table, table._nt_idx[non_terminal] * table._ncols)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._nt_idx)
+
+    def __len__(self) -> int:
+        return len(self._table._nt_idx)
+
+
+class _CellsRow(Mapping[str, Optional[str]]):
+    """Read-only cells of one LL1Table row, indexed by terminal."""
+
+    def __init__(self, table: LL1Table, offset: int) -> None:
+        self._table = table
+        self._offset = offset
+
+    def __getitem__(self, terminal: str) -> Optional[str]:
+        table = self._table
+        return table._cells[self._offset + table._t_idx[terminal]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._t_idx)
+
+    def __len__(self) -> int:
+        return len(self._table._t_idx)
+
+
 class ParseTree():
     """
     Parse Tree.
@@ -372,9 +607,11 @@ class ParseTree():
         root: root node of the tree.
         children: list of children, which are also ParseTree objects.
     """
-    def __init__(self, root: str, children: Collection[ParseTree] = []) -> None:
+    def __init__(self, root: str, children: Collection[ParseTree] = ()) -> None:
         self.root = root
-        self.children = children
+        self.children: Tuple[ParseTree, ...] = (
+            children if isinstance(children, tuple) else tuple(children)
+        )
 
     def __repr__(self) -> str:
         return (
@@ -384,11 +621,13 @@ class ParseTree():
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, type(self)):
             return NotImplemented
+        children = self.children
+        other_children = other.children
         return (
             self.root == other.root
-            and len(self.children) == len(other.children)
-            and all([x.__eq__(y) for x, y in zip(self.children, other.children)])
+            and len(children) == len(other_children)
+            and all(x == y for x, y in zip(children, other_children))
         )
 
     def add_children(self, children: Collection[ParseTree]) -> None:
-        self.children = children
+        self.children = tuple(children)
@@ -135,6 +135,20 @@ class TestAnalyze(unittest.TestCase):
         
         self._check_parse_tree(table, "i*i$", "E", tree)
 
+    def test_case4_default_children(self) -> None:
+        """Test that parse trees do not share their default children."""
+        t1 = ParseTree("X")
+        t2 = ParseTree("Y")
+        with self.assertRaises(AttributeError):
+            t1.children.append(ParseTree("a"))  # type: ignore[attr-defined]
+        self.assertEqual(len(t1.children), 0)
+        self.assertEqual(len(t2.children), 0)
+
+        children = [ParseTree("a")]
+        t3 = ParseTree("Z", children)
+        children.append(ParseTree("b"))
+        self.assertEqual(t3, ParseTree("Z", [ParseTree("a")]))
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -102,5 +102,18 @@ class TestFirst(unittest.TestCase):
         self._check_first(grammar, "S", {''})
         self._check_first(grammar, "A", {''})
 
+    def test_case7_left_recursion(self) -> None:
+        """Test FIRST with nullable left-recursive non-terminals."""
+        grammar_str = """
+        S -> SaB
+        S -> B
+        B -> Bb
+        B ->
+        """
+        grammar = GrammarFormat.read(grammar_str)
+        self._check_first(grammar, "B", {'b', ''})
+        self._check_first(grammar, "S", {'a', 'b', ''})
+        self._check_first(grammar, "SaB", {'a', 'b'})
+
 if __name__ == '__main__':
     unittest.main()
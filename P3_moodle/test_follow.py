@@ -95,6 +95,31 @@ class TestFollow(unittest.TestCase):
         self._check_follow(grammar, "S", {'$'})
         self._check_follow(grammar, "A", {'$'})
 
+    def test_case7_left_recursion(self) -> None:
+        """FOLLOW with nullable left-recursive non-terminals."""
+        grammar_str = """
+        S -> SaB
+        S -> B
+        B -> Bb
+        B ->
+        """
+        grammar = GrammarFormat.read(grammar_str)
+        self._check_follow(grammar, "S", {'$', 'a'})
+        self._check_follow(grammar, "B", {'$', 'a', 'b'})
+        self.assertFalse(grammar.is_ll1())
+
+    def test_case8_mutual_recursion(self) -> None:
+        """FOLLOW with mutually recursive non-terminals."""
+        grammar_str = """
+        S -> ASa
+        A -> S
+        A -> b
+        """
+        grammar = GrammarFormat.read(grammar_str)
+        self._check_follow(grammar, "S", {'$', 'a', 'b'})
+        self._check_follow(grammar, "A", {'b'})
+        self.assertFalse(grammar.is_ll1())
+
 
 if __name__ == '__main__':
     unittest.main()